@@ -1,9 +1,12 @@
-from collections import Counter, OrderedDict
+from collections import Counter
 import argparse
-import copy
+import heapq
 import re
 import sys
 
+# a bouquet design is the design name followed by (counter, specie) pairs and the total number of flowers
+DESIGN_PATTERN = re.compile(r'([0-9]+)([a-z]*)')
+
 
 def get_content(input_file):
     """Parses the input_file
@@ -16,34 +19,33 @@ def get_content(input_file):
 
    """
 
-    content = []
-    num_empty_lines = 0
-    if input_file == "":
-        # read from standard input
+    if input_file == "" and sys.stdin.isatty():
+        # read from interactive standard input, line by line until two empty lines are found
+        content = []
+        num_empty_lines = 0
         for line in sys.stdin:
             line = line.strip()
             content.append(line)
             if not line:
                 num_empty_lines += 1
-            # break when two empty lines are found
             if num_empty_lines == 2:
                 break
+    elif input_file == "":
+        # read redirected standard input at once, up to the second empty line
+        content = list(map(str.strip, sys.stdin.read().splitlines()))
+        empty_lines = [i for i, line in enumerate(content) if not line]
+        if len(empty_lines) >= 2:
+            content = content[:empty_lines[1] + 1]
     else:
-        # read from file
+        # read the whole file at once
         with open(input_file) as f:
-            for line in f:
-                line = line.strip()
-                content.append(line)
-                if not line:
-                    num_empty_lines += 1
+            content = list(map(str.strip, f.read().splitlines()))
 
-    if len(content) <= num_empty_lines:
+    if all(not line for line in content):
         return []
     else:
         return content
 
-    return content
-
 
 def parse_content(content):
     """Parses the content
@@ -59,34 +61,16 @@ def parse_content(content):
 
    """
 
-    # Get the bouquet design and flowers
-    large_bouquets_designs_str = []
-    small_bouquets_designs_str = []
-    large_flowers = []
-    small_flowers = []
-
-    reading_bouquet_design = True
-
-    for c in content:
+    # Get the bouquet design and flowers: the designs come before the first empty line, the flowers after it
+    separator = content.index('') if '' in content else len(content)
+    designs_str = content[:separator]
+    flowers_str = content[separator + 1:]
 
-        if not c:
-            reading_bouquet_design = False
-            continue
-
-        if reading_bouquet_design:
-
-            if c[1] == 'L':
-                large_bouquets_designs_str.append(c)
-            elif c[1] == 'S':
-                small_bouquets_designs_str.append(c)
-        else:
-            if c[1] == 'L':
-                large_flowers.append(c[0])
-            elif c[1] == 'S':
-                small_flowers.append(c[0])
-
-    large_flowers = Counter(large_flowers)
-    small_flowers = Counter(small_flowers)
+    # the second character is the size (c[1:2] is empty for the remaining empty lines)
+    large_bouquets_designs_str = [c for c in designs_str if c[1:2] == 'L']
+    small_bouquets_designs_str = [c for c in designs_str if c[1:2] == 'S']
+    large_flowers = Counter(c[0] for c in flowers_str if c[1:2] == 'L')
+    small_flowers = Counter(c[0] for c in flowers_str if c[1:2] == 'S')
 
     return large_bouquets_designs_str, small_bouquets_designs_str, large_flowers, small_flowers
 
@@ -104,87 +88,145 @@ def parse_bouquet_design(bouquet_design):
 
    """
 
-    design_counters = re.findall(r'[0-9]+', bouquet_design)
-    for i in range(len(design_counters)):
-        design_counters[i] = int(design_counters[i])
-    design_species = re.findall(r'[a-z]+', bouquet_design)
+    # single scan: each match is a (counter, specie) pair, the last one is the total number of flowers with no specie
+    design_counters_species = DESIGN_PATTERN.findall(bouquet_design)
 
-    design = {}
-    for i, s in enumerate(design_species):
-        design[s] = design_counters[i]
+    design = {s: int(c) for c, s in design_counters_species[:-1]}
 
-    num_flowers_bouquet = design_counters[-1]
+    num_flowers_bouquet = int(design_counters_species[-1][0])
     design_name = bouquet_design[:2]
 
     return design, num_flowers_bouquet, design_name
 
 
-def bouquet_from_design_with_most_common_flowers(design, flowers):
+def compute_harmonic_numbers(n):
+    """Computes the harmonic numbers H(0), ..., H(n), where H(k) = 1 + 1/2 + ... + 1/k
+
+    Parameters:
+    n (int): the largest harmonic number to compute
+
+    Returns:
+    harmonic_numbers (list): the harmonic numbers, harmonic_numbers[k] = H(k)
+
+   """
+
+    harmonic_numbers = [0.0]
+    for k in range(1, n + 1):
+        harmonic_numbers.append(harmonic_numbers[-1] + 1.0 / k)
+
+    return harmonic_numbers
+
+
+def specie_cost(num_available, total_number_of_flowers, num_added, harmonic_numbers):
+    """Computes the marginal cost of adding flowers of the same specie to a bouquet, one after the other.
+       Adding a flower costs 1 - num_available / total_number_of_flowers, so the sum over num_added flowers
+       equals (total_number_of_flowers - num_available) * (H(total_number_of_flowers) - H(total_number_of_flowers - num_added))
+
+    Parameters:
+    num_available (int): the number of available flowers of the specie
+    total_number_of_flowers (int): the total number of available flowers
+    num_added (int): the number of flowers of the specie to add
+    harmonic_numbers (list): the harmonic numbers up to the total number of flowers (see compute_harmonic_numbers)
+
+    Returns:
+    cost_value (float): the marginal cost of adding the flowers
+
+   """
+
+    return (total_number_of_flowers - num_available) * \
+        (harmonic_numbers[total_number_of_flowers] - harmonic_numbers[total_number_of_flowers - num_added])
+
+
+def design_is_possible(design, flowers, total_number_of_flowers):
+    """Checks if a bouquet can be formed from design, without computing its cost
+
+    Parameters:
+    design (tuple): the bouquet design as (specie index, counter) pairs and additional information, such as the total
+                    number of flowers and the bouquet design name (e.g. (((0, 10), (1, 15)), 25, 'AL'))
+    flowers (list): the number of available flowers of each specie, indexed by specie
+    total_number_of_flowers (int): the total number of available flowers
+
+    Returns:
+    possible (bool): True if there are enough flowers of each design specie and enough flowers in total
+
+   """
+
+    if total_number_of_flowers < design[1]:
+        return False
+
+    for s, num_specie in design[0]:
+        if flowers[s] < num_specie:
+            return False
+
+    return True
+
+
+def bouquet_from_design_with_most_common_flowers(design, flowers, total_number_of_flowers, harmonic_numbers):
     """Computes the bouquet from design using the most common flowers for the extra space
-       Adds the flowers one by one and add the marginal cost computed as flower scarcity
+       Adds the flowers specie by specie and the marginal cost computed as flower scarcity
+       The design and the flowers are only read: the bouquet is simulated on top of the available flowers
+       The design must be possible (see design_is_possible)
 
     Parameters:
-    design (tuple): the bouquet design and additional information, such as the total number of flowers
-                    and the bouquet design name (e.g. ({'a':10, 'b': 15}, 25, 'AL'))
+    design (tuple): the bouquet design as (specie index, counter) pairs and additional information, such as the total
+                    number of flowers and the bouquet design name (e.g. (((0, 10), (1, 15)), 25, 'AL'))
+    flowers (list): the number of available flowers of each specie, indexed by specie
+    total_number_of_flowers (int): the total number of available flowers
+    harmonic_numbers (list): the harmonic numbers up to the total number of flowers (see compute_harmonic_numbers)
 
     Returns:
-    bouquet (dict): the bouquet stored as a dict (e.g. {'a':10, 'b': 15}). Empty if bouquet cannot be formed
-    cost_value (float): the value of the cost function (bouquets with common flowers have a lower cost). 1e99 if bouquet cannot be formed
+    bouquet (dict): the bouquet stored as a dict of specie indices (e.g. {0:10, 1: 15})
+    cost_value (float): the value of the cost function (bouquets with common flowers have a lower cost)
 
    """
 
     remaining_flowers_to_add = design[1]
-    total_number_of_flowers = sum(flowers.values())
     bouquet = {}
-    large_cost = 1e99
     cost_value = 0.0
 
-    # add flowers one by one and add the marginal cost of addition
-    # cost
-    for s in design[0].keys():
-
-        # enough flowers to complete the required design and total_number_of_flowers must be larger than 0
-        if flowers[s] < design[0][s] or total_number_of_flowers <= 0:
-            # design not possible
-            return {}, large_cost
+    # add the flowers of each specie and the marginal cost of their addition
+    for s, num_specie in design[0]:
 
-        bouquet[s] = 0
-        for j in range(design[0][s]):
-            # calculate cost
-            cost_value += 1.0 - flowers[s] / total_number_of_flowers
-            flowers[s] -= 1
-            total_number_of_flowers -= 1
-            remaining_flowers_to_add -= 1
-            bouquet[s] += 1
+        # calculate cost
+        cost_value += specie_cost(flowers[s], total_number_of_flowers, num_specie, harmonic_numbers)
+        total_number_of_flowers -= num_specie
+        remaining_flowers_to_add -= num_specie
+        bouquet[s] = num_specie
 
     # bouquet completed, return
-    if remaining_flowers_to_add == 0:
+    if remaining_flowers_to_add <= 0:
         return bouquet, cost_value
 
-    # add extra space
-    for i in range(remaining_flowers_to_add):
+    # max heap of the flowers left after taking the design species, exhausted species are left out.
+    # Ties are broken by specie index, which follows the insertion order as in Counter.most_common
+    most_common = [(bouquet.get(s, 0) - count, s) for s, count in enumerate(flowers) if count > bouquet.get(s, 0)]
+    heapq.heapify(most_common)
 
-        # get the most common flower
-        most_common = flowers.most_common(1)
-        s = most_common[0][0]
+    # add extra space
+    while remaining_flowers_to_add > 0:
 
-        # specie mist mot be empty and total_number_of_flowers must be larger than 0
-        if flowers[s] < 0 or total_number_of_flowers <= 0:
-            return {}, large_cost
+        # get the most common flower, the top of the heap
+        negative_count, s = most_common[0]
+        available = -negative_count
 
-        # id specie is new in the bouquet, add it
-        if s not in bouquet.keys():
-            bouquet[s] = 0
+        # the specie stays the most common until it drops below the runner-up (or equals it, if the runner-up comes first),
+        # so add all these flowers at once
+        num_added = remaining_flowers_to_add
+        if len(most_common) > 1:
+            negative_count_next, s_next = min(most_common[1:3])
+            num_added = min(num_added, available + negative_count_next + (1 if s < s_next else 0))
 
         # calculate cost
-        cost_value += 1.0 - flowers[s] / total_number_of_flowers
-        flowers[s] -= 1
-        total_number_of_flowers -= 1
-        remaining_flowers_to_add -= 1
-        bouquet[s] += 1
-
-        if flowers[s] == 0:
-            del flowers[s]
+        cost_value += specie_cost(available, total_number_of_flowers, num_added, harmonic_numbers)
+        total_number_of_flowers -= num_added
+        remaining_flowers_to_add -= num_added
+        bouquet[s] = bouquet.get(s, 0) + num_added
+
+        # decrease the count of the specie in place, or remove it when exhausted
+        if available > num_added:
+            heapq.heapreplace(most_common, (num_added - available, s))
+        else:
+            heapq.heappop(most_common)
 
     return bouquet, cost_value
 
@@ -195,6 +237,7 @@ def compute_bouquets(designs, flowers):
     Parameters:
     designs (list): All bouquet designs. Each entry stores a tuple with the bouquet design and additional information,
                     such as the total number of flowers and the bouquet design name (e.g. ({'a':10, 'b': 15}, 25, 'AL'))
+    flowers (dict): the number of available flowers of each specie (a plain dict or a Counter), updated with the flowers left
 
     Returns:
     bouquets (list): all computed bouquets as a list of dictionaries
@@ -202,32 +245,71 @@ def compute_bouquets(designs, flowers):
 
    """
 
+    # struct of arrays layout: species are indexed in the flowers insertion order (species only found in designs last),
+    # the flowers become a vector of counters and the designs tuples of (specie index, counter) pairs.
+    # Plain lists are used: there are at most 26 species, and typed arrays would box an int on every access
+    species = list(flowers.keys())
+    species += sorted({s for d in designs for s in d[0].keys()}.difference(species))
+    specie_index = {s: i for i, s in enumerate(species)}
+    flowers_vector = [flowers.get(s, 0) for s in species]
+    # the designs are built once as immutable tuples and shared by all evaluations
+    designs_vectors = [(tuple((specie_index[s], c) for s, c in d[0].items()), d[1], d[2]) for d in designs]
+
     # compute all flowers
-    num_flowers = sum(flowers.values())
+    num_flowers = sum(flowers_vector)
+
+    # the marginal costs of the design species are computed from the harmonic numbers
+    harmonic_numbers = compute_harmonic_numbers(num_flowers)
+
+    # flowers are only removed, so a design that cannot be formed anymore is dropped for good
+    possible_designs = designs_vectors
 
     bouquets = []
-    while num_flowers > 0:
+    while num_flowers > 0 and possible_designs:
+
+        # specialization: a single possible design without extra space always forms the same bouquet,
+        # so all its copies are generated at once
+        if len(possible_designs) == 1 and 0 < possible_designs[0][1] <= sum(c for s, c in possible_designs[0][0]):
+            design_species, num_flowers_bouquet, design_name = possible_designs[0]
+            num_copies = min(flowers_vector[s] // c for s, c in design_species if c > 0)
+            for i in range(num_copies):
+                bouquets.append(({species[s]: c for s, c in design_species}, design_name))
+            for s, c in design_species:
+                num_flowers -= num_copies * c
+                flowers_vector[s] -= num_copies * c
+            break
+
         bouquet_to_generate = {}
         cost = 1e99
+        still_possible_designs = []
         # first find which bouquet should be generated first, based on the minim cost
-        for d in designs:
-            # We need to use a deep copy because we do not want to operate with a modified variables
+        for d in possible_designs:
+            # skip the cost computation if the design cannot be formed
+            if not design_is_possible(d, flowers_vector, num_flowers):
+                continue
+            still_possible_designs.append(d)
+
+            # the evaluation does not modify the design (a tuple of tuples) or the flowers, no copy is needed
             # (we have not decided which design to pick)
-            design = copy.deepcopy(d)
-            flowers_copy = copy.deepcopy(flowers)
-            bouquet, minimum_cost = bouquet_from_design_with_most_common_flowers(design, flowers_copy)
+            bouquet, minimum_cost = bouquet_from_design_with_most_common_flowers(d, flowers_vector, num_flowers, harmonic_numbers)
             if minimum_cost < cost:
                 cost = minimum_cost
-                bouquet_to_generate = (bouquet, design[2])
+                bouquet_to_generate = (bouquet, d[2])
+        possible_designs = still_possible_designs
 
         if not bouquet_to_generate:
             break
 
         # generate the bouquet with the minimum cost
-        bouquets.append(bouquet_to_generate)
-        for s in bouquet_to_generate[0].keys():
-            num_flowers -= bouquet_to_generate[0][s]
-            flowers[s] -= bouquet_to_generate[0][s]
+        bouquet, design_name = bouquet_to_generate
+        bouquets.append(({species[s]: c for s, c in bouquet.items()}, design_name))
+        for s, c in bouquet.items():
+            num_flowers -= c
+            flowers_vector[s] -= c
+
+    # report the flowers left
+    for s in flowers.keys():
+        flowers[s] = flowers_vector[specie_index[s]]
 
     return bouquets, num_flowers
 
@@ -246,10 +328,7 @@ def encode_bouquets(bouquets):
 
     encoded_bouquet = []
     for b in bouquets:
-        enc = b[1]
-        od = OrderedDict(sorted(b[0].items()))
-        for s, v in od.items():
-            enc += str(v) + s
+        enc = b[1] + ''.join(str(v) + s for s, v in sorted(b[0].items()))
         encoded_bouquet.append(enc)
 
     return encoded_bouquet
@@ -302,16 +381,15 @@ def compute(input_file):
     encoded_large_bouquets = encode_bouquets(large_bouquets)
     encoded_small_bouquet = encode_bouquets(small_bouquets)
 
+    # one line per bouquet, written with a single call
+    large_bouquets_lines = ''.join(v + '\n' for v in encoded_large_bouquets)
+    small_bouquets_lines = ''.join(v + '\n' for v in encoded_small_bouquet)
+
     # save results to file and stream it to standard output
     with open("output.txt", 'w') as f:
-        print('large bouquets formed ')
-        for v in encoded_large_bouquets:
-            f.write("%s\n" % v)
-            print(v)
-        print('small bouquets formed ')
-        for v in encoded_small_bouquet:
-            f.write("%s\n" % v)
-            print(v)
+        f.write(large_bouquets_lines + small_bouquets_lines)
+    sys.stdout.write('large bouquets formed \n' + large_bouquets_lines +
+                     'small bouquets formed \n' + small_bouquets_lines)
 
 
 if __name__ == "__main__":